@@ -4,12 +4,9 @@ Complete execution flow for sales data processing and analysis.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
-from utils.data_processor import (
-    calculate_total_revenue, region_wise_sales, top_selling_products,
-    customer_analysis, daily_sales_trend, find_peak_sales_day,
-    low_performing_products
-)
+from utils.data_processor import compute_all_aggregates
 from utils.api_handler import fetch_all_products, enrich_sales_data, save_enriched_data
 from utils.report_generator import generate_sales_report
 
@@ -27,10 +24,14 @@ def print_step(step_num, total_steps, message):
     print(f"[{step_num}/{total_steps}] {message}")
 
 
-def main():
+def main(use_cache=True):
     """
     Main execution function
     
+    Args:
+        use_cache (bool): Allow the cached API product catalog to be used;
+            pass --no-cache on the command line to force a refresh
+    
     Workflow:
     1. Print welcome message
     2. Read sales data file (handle encoding)
@@ -130,13 +131,12 @@ def main():
         # Step 6: Perform data analysis
         print_step(5, 13, "Analyzing sales data...")
         
-        total_revenue = calculate_total_revenue(filtered_transactions)
-        region_stats = region_wise_sales(filtered_transactions)
-        top_products = top_selling_products(filtered_transactions, n=5)
-        customer_stats = customer_analysis(filtered_transactions)
-        daily_trend = daily_sales_trend(filtered_transactions)
-        peak_day = find_peak_sales_day(filtered_transactions)
-        low_products = low_performing_products(filtered_transactions, threshold=10)
+        # One pass over the data produces every aggregate
+        aggregates = compute_all_aggregates(filtered_transactions, n=5, threshold=10)
+        total_revenue = aggregates['total_revenue']
+        region_stats = aggregates['by_region']
+        top_products = aggregates['top_products']
+        peak_day = aggregates['peak_day']
         
         print(f"✓ Analysis complete")
         print(f"  - Total Revenue: ₹{total_revenue:,.2f}")
@@ -146,7 +146,7 @@ def main():
         
         # Step 7: Fetch product data from API
         print_step(6, 13, "Fetching product data from API...")
-        api_products = fetch_all_products()
+        api_products = fetch_all_products(use_cache=use_cache)
         print()
         
         # Step 8: Enrich sales data
@@ -154,14 +154,17 @@ def main():
         enriched_transactions = enrich_sales_data(filtered_transactions, api_products)
         print()
         
-        # Step 9: Save enriched data
-        print_step(8, 13, "Saving enriched data...")
-        save_enriched_data(enriched_transactions)
-        print()
-        
-        # Step 10: Generate report
-        print_step(9, 13, "Generating comprehensive report...")
-        generate_sales_report(filtered_transactions, enriched_transactions)
+        # Steps 9-10: Save enriched data on a background thread while the
+        # report is generated; neither step modifies the transactions
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            print_step(8, 13, "Saving enriched data...")
+            save_future = executor.submit(save_enriched_data, enriched_transactions)
+            print()
+            
+            print_step(9, 13, "Generating comprehensive report...")
+            generate_sales_report(filtered_transactions, enriched_transactions,
+                                  aggregates=aggregates)
+            save_future.result()
         print()
         
         # Step 11: Success message
@@ -187,4 +190,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(use_cache='--no-cache' not in sys.argv[1:])
@@ -2,11 +2,14 @@
 """Quick test script to verify all modules work correctly"""
 
 import sys
-from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
+from utils.file_handler import (
+    read_sales_data, parse_transactions, validate_and_filter,
+    iter_sales_data, iter_transactions, iter_valid_transactions
+)
 from utils.data_processor import (
     calculate_total_revenue, region_wise_sales, top_selling_products,
     customer_analysis, daily_sales_trend, find_peak_sales_day,
-    low_performing_products
+    low_performing_products, compute_all_aggregates
 )
 from utils.api_handler import fetch_all_products
 from utils.report_generator import generate_sales_report
@@ -43,6 +46,7 @@ customers = customer_analysis(valid)
 daily = daily_sales_trend(valid)
 peak = find_peak_sales_day(valid)
 low = low_performing_products(valid, threshold=10)
+aggregates = compute_all_aggregates(valid, n=3, threshold=10)
 
 print(f"✓ Total Revenue: ₹{revenue:,.2f}")
 print(f"✓ Regions analyzed: {len(regions)}")
@@ -51,6 +55,22 @@ print(f"✓ Customers tracked: {len(customers)}")
 print(f"✓ Daily records: {len(daily)}")
 print(f"✓ Peak sales day: {peak[0]}")
 print(f"✓ Low performers: {len(low)}")
+expected = {
+    'total_revenue': revenue,
+    'by_region': regions,
+    'top_products': top_prod,
+    'by_customer': customers,
+    'by_date': daily,
+    'peak_day': peak,
+    'low_products': low,
+}
+for key, value in expected.items():
+    assert aggregates[key] == value, f"compute_all_aggregates()['{key}'] differs"
+print("✓ Single-pass aggregates match")
+streamed = compute_all_aggregates(
+    iter_valid_transactions(iter_transactions(iter_sales_data('data/sales_data.txt'))), n=3)
+assert streamed == aggregates, "Streaming aggregates differ"
+print("✓ Streaming aggregates match")
 print()
 
 # Test 5: API (if available)
@@ -3,14 +3,134 @@ API Handler Module - Task 3: API Integration
 Handles fetching product data from DummyJSON API and enriching sales data.
 """
 
+import os
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+# orjson is an optional accelerator for decoding the API response
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-def fetch_all_products():
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+PAGE_SIZE = 100         # DummyJSON's maximum page size
+MAX_FETCH_WORKERS = 8   # Concurrent page requests once the catalog spans pages
+
+
+def _create_session():
+    """
+    Creates the shared HTTP session used for all API calls
+    
+    Returns:
+        requests.Session: Session with keep-alive pooling, gzip and retries
+    """
+    session = requests.Session()
+    session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    
+    # Retry transient gateway errors; successful requests pay nothing extra
+    retries = Retry(total=3, backoff_factor=0.3,
+                    status_forcelist=[502, 503, 504], raise_on_status=False)
+    session.mount('https://', HTTPAdapter(pool_connections=1,
+                                          pool_maxsize=MAX_FETCH_WORKERS,
+                                          max_retries=retries))
+    return session
+
+
+# Module-level session so repeated calls reuse the TCP/TLS connection
+_SESSION = _create_session()
+
+# Local copy of the simplified product catalog and how long it stays fresh
+PRODUCTS_CACHE_FILE = 'data/.products_cache.json'
+PRODUCTS_CACHE_TTL = 24 * 60 * 60  # seconds
+
+
+def _load_cached_products(cache_file=PRODUCTS_CACHE_FILE, ttl=PRODUCTS_CACHE_TTL):
+    """
+    Loads the product catalog from the on-disk cache if it is still fresh
+    
+    Args:
+        cache_file (str): Path of the cache file
+        ttl (float, optional): Maximum age in seconds; None accepts a cache
+            of any age (used as the offline fallback)
+    
+    Returns:
+        list: Cached product dictionaries, or None if missing/stale/unreadable
+    """
+    try:
+        if ttl is not None and time.time() - os.path.getmtime(cache_file) > ttl:
+            return None
+        with open(cache_file, 'rb') as f:
+            products = _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    
+    return products if isinstance(products, list) and products else None
+
+
+def _save_cached_products(products, cache_file=PRODUCTS_CACHE_FILE):
+    """
+    Atomically writes the product catalog to the on-disk cache
+    
+    A failed write only means the next run fetches from the API again.
+    """
+    tmp_file = f"{cache_file}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"WARNING: Could not write product cache: {e}")
+
+
+def _fetch_page(skip, limit=PAGE_SIZE):
+    """
+    Fetches one page of products from DummyJSON API
+    
+    Args:
+        skip (int): Number of products to skip
+        limit (int): Page size (default: 100)
+        
+    Returns:
+        tuple: (simplified product dictionaries, total products in catalog)
+    """
+    response = _SESSION.get(PRODUCTS_URL, params={'limit': limit, 'skip': skip},
+                            timeout=(3, 10))
+    response.raise_for_status()
+    
+    data = _json_loads(response.content)
+    products = data.get('products', [])
+    
+    # Extract only needed fields
+    simplified_products = []
+    for product in products:
+        simplified_products.append({
+            'id': product.get('id'),
+            'title': product.get('title'),
+            'category': product.get('category'),
+            'brand': product.get('brand'),
+            'price': product.get('price'),
+            'rating': product.get('rating')
+        })
+    
+    return simplified_products, data.get('total', len(products))
+
+
+def fetch_all_products(use_cache=True):
     """
     Fetches all products from DummyJSON API
     
+    Args:
+        use_cache (bool): Serve the catalog from data/.products_cache.json
+            when it is less than 24 hours old, and fall back to an older
+            cache if the API cannot be reached (default: True)
+    
     Returns:
         list: List of product dictionaries
         
@@ -28,51 +148,57 @@ def fetch_all_products():
     ]
     
     Requirements:
-    - Fetch all available products (use limit=100)
+    - Fetch all available products (use limit=100 per page)
     - Handle connection errors with try-except
     - Return empty list if API fails
     - Print status message (success/failure)
     """
+    if use_cache:
+        cached_products = _load_cached_products()
+        if cached_products is not None:
+            print(f"✓ Loaded {len(cached_products)} products from cache: {PRODUCTS_CACHE_FILE}")
+            return cached_products
+    
     try:
-        url = "https://dummyjson.com/products?limit=100"
+        url = f"{PRODUCTS_URL}?limit={PAGE_SIZE}"
         print(f"Fetching products from API: {url}")
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        # The first page also reports the catalog size; any further pages
+        # are independent, latency-bound requests and are fetched in parallel
+        simplified_products, total = _fetch_page(0)
         
-        data = response.json()
-        products = data.get('products', [])
-        
-        # Extract only needed fields
-        simplified_products = []
-        for product in products:
-            simplified_products.append({
-                'id': product.get('id'),
-                'title': product.get('title'),
-                'category': product.get('category'),
-                'brand': product.get('brand'),
-                'price': product.get('price'),
-                'rating': product.get('rating')
-            })
+        remaining_skips = range(PAGE_SIZE, total, PAGE_SIZE)
+        if remaining_skips:
+            workers = min(MAX_FETCH_WORKERS, len(remaining_skips))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for page_products, _ in executor.map(_fetch_page, remaining_skips):
+                    simplified_products.extend(page_products)
         
         print(f"✓ Successfully fetched {len(simplified_products)} products from API")
+        if simplified_products:
+            _save_cached_products(simplified_products)
         return simplified_products
         
     except requests.exceptions.Timeout:
         print("ERROR: API request timed out")
-        return []
     except requests.exceptions.ConnectionError:
         print("ERROR: Could not connect to API")
-        return []
     except requests.exceptions.HTTPError as e:
         print(f"ERROR: HTTP error occurred: {e}")
-        return []
     except (json.JSONDecodeError, KeyError) as e:
         print(f"ERROR: Invalid response format from API: {e}")
-        return []
     except Exception as e:
         print(f"ERROR: Failed to fetch products: {e}")
-        return []
+    
+    # Offline or API failure: an expired catalog still beats no enrichment
+    if use_cache:
+        stale_products = _load_cached_products(ttl=None)
+        if stale_products is not None:
+            print(f"WARNING: Using expired product cache ({len(stale_products)} products): "
+                  f"{PRODUCTS_CACHE_FILE}")
+            return stale_products
+    
+    return []
 
 
 def create_product_mapping(api_products):
@@ -107,6 +233,41 @@ def create_product_mapping(api_products):
     return product_mapping
 
 
+def _resolve_api_fields(product_id_str, product_mapping):
+    """
+    Resolves one ProductID against the API product mapping
+    
+    Args:
+        product_id_str (str): Local product ID (e.g. 'P101')
+        product_mapping (dict): Mapping from create_product_mapping()
+        
+    Returns:
+        dict: API_Category, API_Brand, API_Rating and API_Match fields
+    """
+    # Try to extract numeric ID from ProductID (e.g., P101 -> 101)
+    try:
+        numeric_id = int(product_id_str[1:]) if product_id_str.startswith('P') else None
+    except (ValueError, IndexError):
+        numeric_id = None
+    
+    # Look up in API data
+    if numeric_id and numeric_id in product_mapping:
+        api_product = product_mapping[numeric_id]
+        return {
+            'API_Category': api_product.get('category'),
+            'API_Brand': api_product.get('brand'),
+            'API_Rating': api_product.get('rating'),
+            'API_Match': True
+        }
+    
+    return {
+        'API_Category': None,
+        'API_Brand': None,
+        'API_Rating': None,
+        'API_Match': False
+    }
+
+
 def enrich_sales_data(transactions, api_products):
     """
     Enriches sales transactions with API product data
@@ -117,38 +278,32 @@ def enrich_sales_data(transactions, api_products):
         
     Returns:
         list: List of enriched transaction dictionaries
+        
+    The API fields are added to the given dictionaries in place (no per-row
+    copy); the returned list holds those same dictionaries.
     """
     # Create product mapping
     product_mapping = create_product_mapping(api_products)
     
+    # Each distinct ProductID is parsed and looked up once; rows for the
+    # same product reuse the resolved fields
+    resolved_fields = {}
+    
     enriched_transactions = []
     enriched_count = 0
     
     for transaction in transactions:
-        enriched_transaction = transaction.copy()
-        
-        # Try to extract numeric ID from ProductID (e.g., P101 -> 101)
         product_id_str = transaction['ProductID']
-        try:
-            numeric_id = int(product_id_str[1:]) if product_id_str.startswith('P') else None
-        except (ValueError, IndexError):
-            numeric_id = None
-        
-        # Look up in API data
-        if numeric_id and numeric_id in product_mapping:
-            api_product = product_mapping[numeric_id]
-            enriched_transaction['API_Category'] = api_product.get('category')
-            enriched_transaction['API_Brand'] = api_product.get('brand')
-            enriched_transaction['API_Rating'] = api_product.get('rating')
-            enriched_transaction['API_Match'] = True
+        api_fields = resolved_fields.get(product_id_str)
+        if api_fields is None:
+            api_fields = resolved_fields[product_id_str] = _resolve_api_fields(
+                product_id_str, product_mapping)
+        
+        transaction.update(api_fields)
+        if api_fields['API_Match']:
             enriched_count += 1
-        else:
-            enriched_transaction['API_Category'] = None
-            enriched_transaction['API_Brand'] = None
-            enriched_transaction['API_Rating'] = None
-            enriched_transaction['API_Match'] = False
         
-        enriched_transactions.append(enriched_transaction)
+        enriched_transactions.append(transaction)
     
     enrichment_rate = (enriched_count / len(transactions) * 100) if transactions else 0
     print(f"✓ Enriched {enriched_count}/{len(transactions)} transactions ({enrichment_rate:.1f}%)")
@@ -170,33 +325,26 @@ def save_enriched_data(enriched_transactions, filename='output/enriched_sales_da
     
     """
     try:
+        header = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
+        
+        # Format all rows lazily and hand them to the file in one call
+        rows = (f"{t['TransactionID']}|"
+                f"{t['Date']}|"
+                f"{t['ProductID']}|"
+                f"{t['ProductName']}|"
+                f"{t['Quantity']}|"
+                f"{t['UnitPrice']}|"
+                f"{t['CustomerID']}|"
+                f"{t['Region']}|"
+                f"{t.get('API_Category', '')}|"
+                f"{t.get('API_Brand', '')}|"
+                f"{t.get('API_Rating', '')}|"
+                f"{t.get('API_Match', False)}\n"
+                for t in enriched_transactions)
+        
         with open(filename, 'w', encoding='utf-8') as f:
-            # Write header
-            header = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
             f.write(header)
-            
-            # Write data rows
-            for transaction in enriched_transactions:
-                # Handle None values
-                api_category = transaction.get('API_Category', '')
-                api_brand = transaction.get('API_Brand', '')
-                api_rating = transaction.get('API_Rating', '')
-                api_match = transaction.get('API_Match', False)
-                
-                row = (f"{transaction['TransactionID']}|"
-                       f"{transaction['Date']}|"
-                       f"{transaction['ProductID']}|"
-                       f"{transaction['ProductName']}|"
-                       f"{transaction['Quantity']}|"
-                       f"{transaction['UnitPrice']}|"
-                       f"{transaction['CustomerID']}|"
-                       f"{transaction['Region']}|"
-                       f"{api_category}|"
-                       f"{api_brand}|"
-                       f"{api_rating}|"
-                       f"{api_match}\n")
-                
-                f.write(row)
+            f.writelines(rows)
         
         print(f"✓ Saved enriched data to: {filename}")
         return True
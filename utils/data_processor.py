@@ -3,8 +3,65 @@ Data Processor Module - Task 2: Data Processing
 Performs comprehensive analysis on sales transactions.
 """
 
+import heapq
 from datetime import datetime
-from collections import defaultdict
+
+
+def _group_by(transactions, key, distinct=None):
+    """
+    Aggregates transactions by one field in a single pass
+    
+    Args:
+        transactions (list): List of transaction dictionaries
+        key (str): Field to group on (e.g. 'Region', 'ProductName')
+        distinct (str, optional): Field whose distinct values are collected per group
+        
+    Returns:
+        dict: Mapping of group value to [revenue, transaction_count, quantity]
+              (plus a set of distinct values when `distinct` is given)
+    """
+    # Plain dict + mutable list per group: no factory call per new key
+    groups = {}
+    lookup = groups.get
+    
+    # Two specialised loops so the common case carries no per-row
+    # branch for distinct-value tracking
+    if distinct is None:
+        for transaction in transactions:
+            quantity = transaction['Quantity']
+            amount = transaction.get('Amount')
+            if amount is None:  # not built by parse_transactions()
+                amount = quantity * transaction['UnitPrice']
+            group_key = transaction[key]
+            
+            group = lookup(group_key)
+            if group is None:
+                group = groups[group_key] = [0.0, 0, 0]
+            
+            group[0] += amount
+            group[1] += 1
+            group[2] += quantity
+        
+        return groups
+    
+    # Distinct values are collected in plain sets of interned strings
+    for transaction in transactions:
+        quantity = transaction['Quantity']
+        amount = transaction.get('Amount')
+        if amount is None:  # not built by parse_transactions()
+            amount = quantity * transaction['UnitPrice']
+        group_key = transaction[key]
+        
+        group = lookup(group_key)
+        if group is None:
+            group = groups[group_key] = [0.0, 0, 0, set()]
+        
+        group[0] += amount
+        group[1] += 1
+        group[2] += quantity
+        group[3].add(transaction[distinct])
+    
+    return groups
 
 
 def calculate_total_revenue(transactions):
@@ -15,15 +72,100 @@ def calculate_total_revenue(transactions):
         transactions (list): List of transaction dictionaries
         
     Returns:
-        float: Total revenue (sum of Quantity * UnitPrice)
+        float: Total revenue (sum of Amount, or Quantity * UnitPrice when a
+               transaction has no precomputed Amount)
     """
     total_revenue = 0.0
     for transaction in transactions:
-        total_revenue += transaction['Quantity'] * transaction['UnitPrice']
-    
+        amount = transaction.get('Amount')
+        if amount is None:
+            amount = transaction['Quantity'] * transaction['UnitPrice']
+        total_revenue += amount
     return total_revenue
 
 
+def _region_summary(region_data, total_revenue):
+    """Builds the region_wise_sales() result from grouped region totals"""
+    result = {}
+    for region, (total_sales, count, _) in sorted(region_data.items(),
+                                                 key=lambda x: x[1][0],
+                                                 reverse=True):
+        percentage = (total_sales / total_revenue * 100) if total_revenue > 0 else 0
+        avg_transaction = total_sales / count if count > 0 else 0
+        result[region] = {
+            'total_sales': total_sales,
+            'transaction_count': count,
+            'percentage': round(percentage, 2),
+            'avg_transaction': round(avg_transaction, 2)
+        }
+    
+    return result
+
+
+def _top_products(product_data, n):
+    """Builds the top_selling_products() result from grouped product totals"""
+    # Bounded heap selection: O(P log n) instead of sorting every product
+    sorted_products = heapq.nlargest(n, product_data.items(), key=lambda x: x[1][2])
+    
+    return [(product, quantity, revenue)
+            for product, (revenue, _, quantity) in sorted_products]
+
+
+def _customer_summary(customer_data):
+    """Builds the customer_analysis() result from grouped customer totals"""
+    result = {}
+    for customer_id, (total_spent, count, _, products) in sorted(customer_data.items(),
+                                                                key=lambda x: x[1][0],
+                                                                reverse=True):
+        avg_order_value = total_spent / count if count > 0 else 0
+        result[customer_id] = {
+            'total_spent': total_spent,
+            'purchase_count': count,
+            'avg_order_value': round(avg_order_value, 2),
+            'products_bought': sorted(products)
+        }
+    
+    return result
+
+
+def _date_sort_key(date):
+    """
+    Sort key placing date strings in true chronological order
+    
+    Parsed once per distinct day (not per transaction); values that are not
+    YYYY-MM-DD dates sort after all real dates, in string order.
+    """
+    try:
+        return (0, datetime.strptime(date, '%Y-%m-%d').toordinal(), date)
+    except (TypeError, ValueError):
+        return (1, 0, date)
+
+
+def _daily_summary(daily_data):
+    """Builds the daily_sales_trend() result from grouped daily totals"""
+    result = {}
+    for date in sorted(daily_data, key=_date_sort_key):
+        revenue, count, _, customers = daily_data[date]
+        result[date] = {
+            'revenue': revenue,
+            'transaction_count': count,
+            'unique_customers': len(customers)
+        }
+    
+    return result
+
+
+def _low_products(product_data, threshold):
+    """Builds the low_performing_products() result from grouped product totals"""
+    low_performers = [(product, quantity, revenue)
+                      for product, (revenue, _, quantity) in product_data.items()
+                      if quantity < threshold]
+    
+    low_performers.sort(key=lambda x: x[1])
+    
+    return low_performers
+
+
 def region_wise_sales(transactions):
     """
     Analyzes sales by region
@@ -39,35 +181,19 @@ def region_wise_sales(transactions):
         'North': {
             'total_sales': 450000.0,
             'transaction_count': 15,
-            'percentage': 29.13
+            'percentage': 29.13,
+            'avg_transaction': 30000.0
         },
         'South': {...},
         ...
     }
     """
-    total_revenue = calculate_total_revenue(transactions)
-    
-    region_data = defaultdict(lambda: {'total_sales': 0.0, 'transaction_count': 0})
+    region_data = _group_by(transactions, 'Region')
     
-    for transaction in transactions:
-        region = transaction['Region']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-        region_data[region]['total_sales'] += amount
-        region_data[region]['transaction_count'] += 1
+    # Overall revenue is the sum of the region totals - no second pass needed
+    total_revenue = sum(group[0] for group in region_data.values())
     
-    # Calculate percentages and sort by total_sales
-    result = {}
-    for region, data in sorted(region_data.items(), 
-                               key=lambda x: x[1]['total_sales'], 
-                               reverse=True):
-        percentage = (data['total_sales'] / total_revenue * 100) if total_revenue > 0 else 0
-        result[region] = {
-            'total_sales': data['total_sales'],
-            'transaction_count': data['transaction_count'],
-            'percentage': round(percentage, 2)
-        }
-    
-    return result
+    return _region_summary(region_data, total_revenue)
 
 
 def top_selling_products(transactions, n=5):
@@ -88,25 +214,7 @@ def top_selling_products(transactions, n=5):
         ...
     ]
     """
-    product_data = defaultdict(lambda: {'quantity': 0, 'revenue': 0.0})
-    
-    for transaction in transactions:
-        product_name = transaction['ProductName']
-        quantity = transaction['Quantity']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-        
-        product_data[product_name]['quantity'] += quantity
-        product_data[product_name]['revenue'] += amount
-    
-    # Sort by quantity descending and get top n
-    sorted_products = sorted(product_data.items(),
-                            key=lambda x: x[1]['quantity'],
-                            reverse=True)[:n]
-    
-    result = [(product, data['quantity'], data['revenue']) 
-              for product, data in sorted_products]
-    
-    return result
+    return _top_products(_group_by(transactions, 'ProductName'), n)
 
 
 def customer_analysis(transactions):
@@ -131,34 +239,7 @@ def customer_analysis(transactions):
         ...
     }
     """
-    customer_data = defaultdict(lambda: {
-        'total_spent': 0.0,
-        'purchase_count': 0,
-        'products': set()
-    })
-    
-    for transaction in transactions:
-        customer_id = transaction['CustomerID']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-        
-        customer_data[customer_id]['total_spent'] += amount
-        customer_data[customer_id]['purchase_count'] += 1
-        customer_data[customer_id]['products'].add(transaction['ProductName'])
-    
-    # Convert to final format and sort by total_spent descending
-    result = {}
-    for customer_id, data in sorted(customer_data.items(),
-                                   key=lambda x: x[1]['total_spent'],
-                                   reverse=True):
-        avg_order_value = data['total_spent'] / data['purchase_count'] if data['purchase_count'] > 0 else 0
-        result[customer_id] = {
-            'total_spent': data['total_spent'],
-            'purchase_count': data['purchase_count'],
-            'avg_order_value': round(avg_order_value, 2),
-            'products_bought': sorted(list(data['products']))
-        }
-    
-    return result
+    return _customer_summary(_group_by(transactions, 'CustomerID', distinct='ProductName'))
 
 
 def daily_sales_trend(transactions):
@@ -182,44 +263,23 @@ def daily_sales_trend(transactions):
         ...
     }
     """
-    daily_data = defaultdict(lambda: {
-        'revenue': 0.0,
-        'transaction_count': 0,
-        'customers': set()
-    })
-    
-    for transaction in transactions:
-        date = transaction['Date']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
-        
-        daily_data[date]['revenue'] += amount
-        daily_data[date]['transaction_count'] += 1
-        daily_data[date]['customers'].add(transaction['CustomerID'])
-    
-    # Convert to final format and sort chronologically
-    result = {}
-    for date in sorted(daily_data.keys()):
-        data = daily_data[date]
-        result[date] = {
-            'revenue': data['revenue'],
-            'transaction_count': data['transaction_count'],
-            'unique_customers': len(data['customers'])
-        }
-    
-    return result
+    return _daily_summary(_group_by(transactions, 'Date', distinct='CustomerID'))
 
 
-def find_peak_sales_day(transactions):
+def find_peak_sales_day(transactions, daily_trend=None):
     """
     Identifies the date with highest revenue
     
     Args:
         transactions (list): List of transaction dictionaries
+        daily_trend (dict, optional): Result of daily_sales_trend() for these
+            transactions; reused instead of re-scanning when given
         
     Returns:
         tuple: (date, revenue, transaction_count)
     """
-    daily_trend = daily_sales_trend(transactions)
+    if daily_trend is None:
+        daily_trend = daily_sales_trend(transactions)
     
     if not daily_trend:
         return None, 0, 0
@@ -249,21 +309,91 @@ def low_performing_products(transactions, threshold=10):
         ...
     ]
     """
-    product_data = defaultdict(lambda: {'quantity': 0, 'revenue': 0.0})
+    return _low_products(_group_by(transactions, 'ProductName'), threshold)
+
+
+def compute_all_aggregates(transactions, n=5, threshold=10):
+    """
+    Computes every analysis in this module in a single pass over the data
+    
+    The input is consumed exactly once, so it may be a generator (e.g.
+    file_handler.iter_valid_transactions()) and memory stays proportional
+    to the number of groups rather than the number of transactions.
+    
+    Args:
+        transactions (iterable): Transaction dictionaries
+        n (int): Number of top products to return (default: 5)
+        threshold (int): Low performer quantity threshold (default: 10)
+        
+    Returns:
+        dict: All aggregates, each in the format of its standalone function
+        
+    Expected Output Format:
+    {
+        'total_revenue': 1545000.0,                # calculate_total_revenue()
+        'by_region': {...},                        # region_wise_sales()
+        'top_products': [...],                     # top_selling_products()
+        'by_customer': {...},                      # customer_analysis()
+        'by_date': {...},                          # daily_sales_trend()
+        'peak_day': ('2024-12-15', 185000.0, 6),   # find_peak_sales_day()
+        'low_products': [...]                      # low_performing_products()
+    }
+    """
+    total_revenue = 0.0
+    region_data = {}
+    product_data = {}
+    customer_data = {}
+    daily_data = {}
     
     for transaction in transactions:
-        product_name = transaction['ProductName']
         quantity = transaction['Quantity']
-        amount = transaction['Quantity'] * transaction['UnitPrice']
+        amount = transaction.get('Amount')
+        if amount is None:  # not built by parse_transactions()
+            amount = quantity * transaction['UnitPrice']
+        total_revenue += amount
         
-        product_data[product_name]['quantity'] += quantity
-        product_data[product_name]['revenue'] += amount
-    
-    # Filter products below threshold and sort by quantity ascending
-    low_performers = [(product, data['quantity'], data['revenue'])
-                      for product, data in product_data.items()
-                      if data['quantity'] < threshold]
+        region = transaction['Region']
+        group = region_data.get(region)
+        if group is None:
+            group = region_data[region] = [0.0, 0, 0]
+        group[0] += amount
+        group[1] += 1
+        group[2] += quantity
+        
+        product_name = transaction['ProductName']
+        group = product_data.get(product_name)
+        if group is None:
+            group = product_data[product_name] = [0.0, 0, 0]
+        group[0] += amount
+        group[1] += 1
+        group[2] += quantity
+        
+        customer_id = transaction['CustomerID']
+        group = customer_data.get(customer_id)
+        if group is None:
+            group = customer_data[customer_id] = [0.0, 0, 0, set()]
+        group[0] += amount
+        group[1] += 1
+        group[2] += quantity
+        group[3].add(product_name)
+        
+        date = transaction['Date']
+        group = daily_data.get(date)
+        if group is None:
+            group = daily_data[date] = [0.0, 0, 0, set()]
+        group[0] += amount
+        group[1] += 1
+        group[2] += quantity
+        group[3].add(customer_id)
     
-    low_performers.sort(key=lambda x: x[1])
+    daily_trend = _daily_summary(daily_data)
     
-    return low_performers
+    return {
+        'total_revenue': total_revenue,
+        'by_region': _region_summary(region_data, total_revenue),
+        'top_products': _top_products(product_data, n),
+        'by_customer': _customer_summary(customer_data),
+        'by_date': daily_trend,
+        'peak_day': find_peak_sales_day(transactions, daily_trend),
+        'low_products': _low_products(product_data, threshold)
+    }
@@ -3,6 +3,31 @@ File Handler Module - Task 1: Data File Handler & Preprocessing
 Handles reading, parsing, and validating sales data with error handling.
 """
 
+import codecs
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+# Grouping fields the parser interns; records coming back from worker
+# processes are unpickled copies and get interned again
+_INTERNED_FIELDS = ('Date', 'ProductID', 'ProductName', 'CustomerID', 'Region')
+
+# Line count from which parse_transactions() spreads the work over worker
+# processes; below it the cost of shipping rows between processes is more
+# than the parsing it saves
+PARALLEL_PARSE_MIN_LINES = 200000
+
+# Bytes read up front to pick the file encoding before the streaming pass
+ENCODING_PROBE_SIZE = 64 * 1024
+
+# Fields every transaction must carry
+_REQUIRED_KEYS = frozenset({
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region'
+})
+
 
 def read_sales_data(filename):
     """
@@ -24,16 +49,17 @@ def read_sales_data(filename):
     - Skip the header row
     - Remove empty lines
     """
-    encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-    lines = []
+    encodings = _candidate_encodings(filename)
+    if encodings is None:
+        return []
     
     for encoding in encodings:
         try:
             with open(filename, 'r', encoding=encoding) as f:
-                lines = f.readlines()
-            print(f"✓ Successfully read file with {encoding} encoding")
-            break
+                header = next(f, None)  # Skip header
+                raw_lines = [line for line in map(str.strip, f) if line]
         except UnicodeDecodeError:
+            # Read the whole file again with the next candidate
             continue
         except FileNotFoundError:
             print(f"ERROR: File not found at {filename}")
@@ -41,29 +67,126 @@ def read_sales_data(filename):
         except Exception as e:
             print(f"ERROR: Problem reading file: {e}")
             return []
+        
+        print(f"✓ Successfully read file with {encoding} encoding")
+        if header is None:
+            break
+        return raw_lines
     
-    if not lines:
-        print("ERROR: Could not read file with any encoding")
-        return []
+    print("ERROR: Could not read file with any encoding")
+    return []
+
+
+def iter_sales_data(filename):
+    """
+    Lazily yields raw transaction lines from the sales data file
+    
+    Streams the file line by line instead of loading it whole; the header
+    row and empty lines are skipped, as in read_sales_data().
+    
+    Lines already yielded cannot be taken back, so if a decode error occurs
+    after that point the rest of the file is decoded with the next encoding
+    and the output mixes encodings. read_sales_data() re-reads the whole
+    file with the fallback encoding instead.
+    
+    Args:
+        filename (str): Path to the sales data file
+        
+    Yields:
+        str: Stripped, non-empty data lines
+    """
+    encodings = _candidate_encodings(filename)
+    if encodings is None:
+        return
+    
+    lines_done = 0  # physical lines (header included) already consumed
+    yielded = False
     
-    # Skip header row and remove empty lines
-    raw_lines = []
-    for i, line in enumerate(lines):
-        if i == 0:  # Skip header
+    for encoding in encodings:
+        try:
+            with open(filename, 'r', encoding=encoding) as f:
+                if next(f, None) is None:
+                    return
+                if lines_done:
+                    print(f"✓ Switched to {encoding} encoding after line {lines_done}")
+                else:
+                    print(f"✓ Successfully read file with {encoding} encoding")
+                
+                for line_number, line in enumerate(f, 1):
+                    # After a decode error past the probe, resume where the
+                    # previous encoding stopped (all candidates agree on '\n')
+                    if line_number < lines_done:
+                        continue
+                    lines_done = line_number + 1
+                    
+                    line = line.strip()
+                    if line:  # Skip empty lines
+                        yielded = True
+                        yield line
+            return
+        except UnicodeDecodeError:
+            if not yielded:
+                # Nothing handed out yet: decode the whole file again
+                lines_done = 0
             continue
-        line = line.strip()
-        if line:  # Skip empty lines
-            raw_lines.append(line)
+        except FileNotFoundError:
+            print(f"ERROR: File not found at {filename}")
+            return
+        except Exception as e:
+            print(f"ERROR: Problem reading file: {e}")
+            return
     
-    return raw_lines
+    print("ERROR: Could not read file with any encoding")
 
 
-def parse_transactions(raw_lines):
+def _candidate_encodings(filename):
+    """
+    Orders the candidate encodings using a binary prefix of the file
+    
+    A prefix is decoded with each candidate and the list starts from the
+    first one that accepts it, so a non-UTF-8 file is not read as UTF-8
+    first. An incremental decoder tolerates a multibyte character cut at
+    the end of the probe.
+    
+    Args:
+        filename (str): Path to the sales data file
+        
+    Returns:
+        list: Encodings to try in order, or None if the file cannot be
+              read (the error has been printed)
+    """
+    encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+    
+    try:
+        with open(filename, 'rb') as f:
+            probe = f.read(ENCODING_PROBE_SIZE)
+    except FileNotFoundError:
+        print(f"ERROR: File not found at {filename}")
+        return None
+    except Exception as e:
+        print(f"ERROR: Problem reading file: {e}")
+        return None
+    
+    for start, encoding in enumerate(encodings):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(probe)
+            return encodings[start:]
+        except UnicodeDecodeError:
+            continue
+    
+    print("ERROR: Could not read file with any encoding")
+    return None
+
+
+def parse_transactions(raw_lines, workers=None):
     """
     Parses raw lines into clean list of dictionaries
     
     Args:
-        raw_lines (list): List of raw transaction strings
+        raw_lines (iterable): Raw transaction strings (list or any iterable)
+        workers (int, optional): Worker processes for large lists
+                                 (default: CPUs this process may run on;
+                                 1 disables)
         
     Returns:
         list: List of dictionaries with transaction data
@@ -78,7 +201,8 @@ def parse_transactions(raw_lines):
             'Quantity': 2,           # int type
             'UnitPrice': 45000.0,    # float type
             'CustomerID': 'C001',
-            'Region': 'North'
+            'Region': 'North',
+            'Amount': 90000.0        # Quantity * UnitPrice
         },
         ...
     ]
@@ -89,10 +213,92 @@ def parse_transactions(raw_lines):
     - Remove commas from numeric fields and convert to proper types
     - Convert Quantity to int
     - Convert UnitPrice to float
+    - Precompute Amount (Quantity * UnitPrice) once for all later stages
     - Skip rows with incorrect number of fields
+    
+    Records stay plain dictionaries, since enrichment extends them in place.
+    
+    Lists of at least PARALLEL_PARSE_MIN_LINES lines are split into
+    contiguous chunks parsed in a process pool, which keeps the input order.
+    The pool is only used where the fork start method exists, so workers
+    never re-import the calling script; elsewhere parsing is serial.
+    Shipping rows between processes costs about half a serial parse, so
+    the pool only pays off when `workers` real cores are available. The
+    default honours CPU affinity but not cgroup quotas; pass workers=1 in
+    CPU-limited containers.
+    """
+    if workers is None:
+        workers = _usable_cpu_count()
+    
+    if (workers > 1 and isinstance(raw_lines, list)
+            and len(raw_lines) >= PARALLEL_PARSE_MIN_LINES
+            and 'fork' in multiprocessing.get_all_start_methods()):
+        chunk_size = -(-len(raw_lines) // workers)
+        chunks = [raw_lines[i:i + chunk_size]
+                  for i in range(0, len(raw_lines), chunk_size)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork')) as executor:
+                transactions = list(chain.from_iterable(executor.map(_parse_chunk, chunks)))
+        except (OSError, RuntimeError) as e:
+            print(f"WARNING: Parallel parsing unavailable ({e}), parsing serially")
+        else:
+            _reintern_fields(transactions)
+            return transactions
+    
+    return list(iter_transactions(raw_lines))
+
+
+def _usable_cpu_count():
+    """
+    Counts the CPUs this process may run on
+    
+    Returns:
+        int: Size of the CPU affinity set where the platform exposes it,
+             otherwise os.cpu_count()
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _parse_chunk(lines):
+    """
+    Parses one chunk of lines in a worker process (top-level so it pickles)
+    
+    Args:
+        lines (list): Raw transaction strings
+        
+    Returns:
+        list: Parsed transaction dictionaries
+    """
+    return list(iter_transactions(lines))
+
+
+def _reintern_fields(transactions):
+    """
+    Interns the grouping fields of records unpickled from worker processes
+    
+    Args:
+        transactions (list): Parsed transaction dictionaries, updated in place
+    """
+    intern = sys.intern
+    for transaction in transactions:
+        for field in _INTERNED_FIELDS:
+            transaction[field] = intern(transaction[field])
+
+
+def iter_transactions(raw_lines):
     """
-    transactions = []
+    Lazily parses raw lines into transaction dictionaries
     
+    Args:
+        raw_lines (iterable): Raw transaction strings, e.g. a file object
+        
+    Yields:
+        dict: One transaction in the parse_transactions() format; malformed
+              rows are skipped
+    """
     for line in raw_lines:
         try:
             fields = line.split('|')
@@ -111,12 +317,15 @@ def parse_transactions(raw_lines):
             customer_id = fields[6].strip()
             region = fields[7].strip()
             
-            # Handle commas in ProductName - remove them
-            product_name = product_name.replace(',', '')
+            # Handle commas in ProductName - remove them (only if present)
+            if ',' in product_name:
+                product_name = product_name.replace(',', '')
             
-            # Remove commas from numeric fields
-            quantity_str = quantity_str.replace(',', '')
-            unit_price_str = unit_price_str.replace(',', '')
+            # Remove commas from numeric fields (only if present)
+            if ',' in quantity_str:
+                quantity_str = quantity_str.replace(',', '')
+            if ',' in unit_price_str:
+                unit_price_str = unit_price_str.replace(',', '')
             
             # Convert to proper types
             try:
@@ -125,24 +334,81 @@ def parse_transactions(raw_lines):
             except ValueError:
                 continue
             
+            # Intern the low-cardinality grouping keys so every row of a
+            # group shares one string object: the hash is computed once and
+            # dict lookups in the analytics and enrichment match on identity
             transaction = {
                 'TransactionID': transaction_id,
-                'Date': date,
-                'ProductID': product_id,
-                'ProductName': product_name,
+                'Date': sys.intern(date),
+                'ProductID': sys.intern(product_id),
+                'ProductName': sys.intern(product_name),
                 'Quantity': quantity,
                 'UnitPrice': unit_price,
-                'CustomerID': customer_id,
-                'Region': region
+                'CustomerID': sys.intern(customer_id),
+                'Region': sys.intern(region),
+                'Amount': quantity * unit_price
             }
             
-            transactions.append(transaction)
-            
         except Exception as e:
             # Skip malformed rows
             continue
+        
+        yield transaction
+
+
+def _is_valid_transaction(transaction):
+    """
+    Applies the validation rules documented in validate_and_filter()
+    
+    Args:
+        transaction (dict): Parsed transaction dictionary
+        
+    Returns:
+        bool: True if the transaction passes every rule
+    """
+    # Validate required fields
+    if not _REQUIRED_KEYS <= transaction.keys():
+        return False
+    
+    # Validation rules as one short-circuiting predicate. The ID prefixes
+    # are single characters, so a one-character slice comparison replaces
+    # the startswith() method calls (and is safe on empty strings)
+    return (transaction['Quantity'] > 0
+            and transaction['UnitPrice'] > 0
+            and transaction['TransactionID'][:1] == 'T'
+            and transaction['ProductID'][:1] == 'P'
+            and transaction['CustomerID'][:1] == 'C'
+            and bool(transaction['Region']))
+
+
+def _amount_bounds(min_amount, max_amount):
+    """
+    Collapses the optional amount filters into one inclusive range
+    
+    Args:
+        min_amount (float, optional): Minimum transaction amount
+        max_amount (float, optional): Maximum transaction amount
+        
+    Returns:
+        tuple: (low, high) bounds, or None when neither filter is active
+    """
+    if not (min_amount or max_amount):
+        return None
     
-    return transactions
+    low = min_amount if min_amount else float('-inf')
+    high = max_amount if max_amount else float('inf')
+    return low, high
+
+
+def _transaction_amount(transaction):
+    """
+    Returns the Amount precomputed by the parser, or Quantity * UnitPrice
+    for transaction dictionaries built elsewhere
+    """
+    amount = transaction.get('Amount')
+    if amount is None:
+        amount = transaction['Quantity'] * transaction['UnitPrice']
+    return amount
 
 
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
@@ -179,79 +445,47 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     - ProductID must start with 'P'
     - CustomerID must start with 'C'
     """
-    valid_transactions = []
-    invalid_count = 0
     filtered_by_region = 0
     filtered_by_amount = 0
     
-    # Get available regions and amount range for display
-    all_amounts = [t['Quantity'] * t['UnitPrice'] for t in transactions 
-                   if t['Quantity'] > 0 and t['UnitPrice'] > 0]
+    # Get available regions and amount range for display; a running
+    # min/max avoids materializing a list of every amount
+    min_trans_amount = float('inf')
+    max_trans_amount = float('-inf')
+    for t in transactions:
+        if t['Quantity'] > 0 and t['UnitPrice'] > 0:
+            amount = _transaction_amount(t)
+            if amount < min_trans_amount:
+                min_trans_amount = amount
+            if amount > max_trans_amount:
+                max_trans_amount = amount
     
-    if all_amounts:
-        min_trans_amount = min(all_amounts)
-        max_trans_amount = max(all_amounts)
-    else:
+    if min_trans_amount > max_trans_amount:  # no positive amounts seen
         min_trans_amount = 0
         max_trans_amount = 0
     
-    available_regions = set()
+    # Validate every row in one C-driven filter() pass; invalid rows are
+    # simply the ones that did not survive
+    valid_transactions = list(filter(_is_valid_transaction, transactions))
+    invalid_count = len(transactions) - len(valid_transactions)
     
-    for transaction in transactions:
-        # Validate required fields
-        required_fields = ['TransactionID', 'Date', 'ProductID', 'ProductName', 
-                          'Quantity', 'UnitPrice', 'CustomerID', 'Region']
-        
-        if not all(field in transaction for field in required_fields):
-            invalid_count += 1
-            continue
-        
-        # Validation rules
-        if transaction['Quantity'] <= 0:
-            invalid_count += 1
-            continue
-        
-        if transaction['UnitPrice'] <= 0:
-            invalid_count += 1
-            continue
-        
-        if not transaction['TransactionID'].startswith('T'):
-            invalid_count += 1
-            continue
-        
-        if not transaction['ProductID'].startswith('P'):
-            invalid_count += 1
-            continue
-        
-        if not transaction['CustomerID'].startswith('C'):
-            invalid_count += 1
-            continue
-        
-        if not transaction['Region']:
-            invalid_count += 1
-            continue
-        
-        # Track available regions
-        available_regions.add(transaction['Region'])
-        
-        # Calculate transaction amount
-        transaction_amount = transaction['Quantity'] * transaction['UnitPrice']
-        
-        # Apply region filter
-        if region and transaction['Region'] != region:
-            filtered_by_region += 1
-            continue
-        
-        # Apply amount filters
-        if min_amount and transaction_amount < min_amount:
-            filtered_by_amount += 1
-            continue
-        
-        if max_amount and transaction_amount > max_amount:
-            filtered_by_amount += 1
-            continue
-        
-        valid_transactions.append(transaction)
+    # Track available regions
+    available_regions = {t['Region'] for t in valid_transactions}
+    
+    # Filters are applied as separate passes, and only when active, so the
+    # common unfiltered run pays nothing per row for them
+    if region:
+        matching = [t for t in valid_transactions if t['Region'] == region]
+        filtered_by_region = len(valid_transactions) - len(matching)
+        valid_transactions = matching
+    
+    amount_bounds = _amount_bounds(min_amount, max_amount)
+    if amount_bounds:
+        low, high = amount_bounds
+        matching = [t for t in valid_transactions
+                    if low <= _transaction_amount(t) <= high]
+        filtered_by_amount = len(valid_transactions) - len(matching)
+        valid_transactions = matching
     
     # Display available options to user
     print("\n" + "="*50)
@@ -271,3 +505,37 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     }
     
     return valid_transactions, invalid_count, filter_summary
+
+
+def iter_valid_transactions(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Lazily yields transactions that pass validation and the optional filters
+    
+    Streaming counterpart of validate_and_filter(): same rules and filters,
+    but no summary or filter display, so input of any size can be piped
+    into data_processor.compute_all_aggregates() in constant memory.
+    
+    Args:
+        transactions (iterable): Transaction dictionaries, e.g. from iter_transactions()
+        region (str, optional): Filter by specific region
+        min_amount (float, optional): Minimum transaction amount (Quantity * UnitPrice)
+        max_amount (float, optional): Maximum transaction amount
+        
+    Yields:
+        dict: Each valid transaction that matches the filters
+    """
+    amount_bounds = _amount_bounds(min_amount, max_amount)
+    low, high = amount_bounds if amount_bounds else (None, None)
+    
+    for transaction in transactions:
+        if not _is_valid_transaction(transaction):
+            continue
+        
+        if region and transaction['Region'] != region:
+            continue
+        
+        # Both amount limits in one chained comparison
+        if amount_bounds and not low <= _transaction_amount(transaction) <= high:
+            continue
+        
+        yield transaction
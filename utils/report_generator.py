@@ -3,16 +3,29 @@ Report Generator Module - Task 4: Report Generation
 Generates comprehensive formatted sales reports.
 """
 
+import heapq
 from datetime import datetime
-from utils.data_processor import (
-    calculate_total_revenue, region_wise_sales, top_selling_products,
-    customer_analysis, daily_sales_trend, find_peak_sales_day, 
-    low_performing_products
-)
+from utils.data_processor import compute_all_aggregates
+
+
+def top_customers(customer_stats, n=5):
+    """
+    Selects the n highest-spending customers
+    
+    Args:
+        customer_stats (dict): Output of customer_analysis()
+        n (int): Number of customers to return (default: 5)
+        
+    Returns:
+        list: (CustomerID, stats) tuples, highest total_spent first
+    """
+    # Bounded heap selection instead of relying on the dict's sort order
+    return heapq.nlargest(n, customer_stats.items(),
+                          key=lambda x: x[1]['total_spent'])
 
 
 def generate_sales_report(transactions, enriched_transactions, 
-                         output_file='output/sales_report.txt'):
+                         output_file='output/sales_report.txt', aggregates=None):
     """
     Generates a comprehensive formatted text report
     
@@ -20,144 +33,172 @@ def generate_sales_report(transactions, enriched_transactions,
         transactions (list): List of validated transaction dictionaries
         enriched_transactions (list): List of enriched transaction dictionaries
         output_file (str): Path to output report file
+        aggregates (dict, optional): Result of compute_all_aggregates() for
+            these transactions (n=5, threshold=10); computed if not given
     """
     
     try:
+        # Every statistic in the report comes from one pass over the data
+        stats_all = aggregates
+        if stats_all is None:
+            stats_all = compute_all_aggregates(transactions, n=5, threshold=10)
+        
+        # Assemble the report in memory and write it with a single call
+        parts = []
+        
+        # ===== 1. HEADER =====
+        parts.append("="*60 + "\n")
+        parts.append(" "*15 + "SALES ANALYTICS REPORT\n")
+        parts.append(" "*10 + f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        parts.append(" "*10 + f"Records Processed: {len(transactions)}\n")
+        parts.append("="*60 + "\n\n")
+        
+        # ===== 2. OVERALL SUMMARY =====
+        parts.append("OVERALL SUMMARY\n")
+        parts.append("-"*60 + "\n")
+        
+        total_revenue = stats_all['total_revenue']
+        total_transactions = len(transactions)
+        avg_order_value = total_revenue / total_transactions if total_transactions > 0 else 0
+        
+        # Date range from the chronologically ordered daily aggregate
+        # instead of collecting every transaction's date
+        daily_trend = stats_all['by_date']
+        days = list(daily_trend)
+        min_date = days[0] if days else "N/A"
+        max_date = days[-1] if days else "N/A"
+        
+        parts.append(f"Total Revenue:         ₹{total_revenue:,.2f}\n")
+        parts.append(f"Total Transactions:    {total_transactions}\n")
+        parts.append(f"Average Order Value:   ₹{avg_order_value:,.2f}\n")
+        parts.append(f"Date Range:            {min_date} to {max_date}\n")
+        parts.append("\n")
+        
+        # ===== 3. REGION-WISE PERFORMANCE =====
+        parts.append("REGION-WISE PERFORMANCE\n")
+        parts.append("-"*60 + "\n")
+        parts.append(f"{'Region':<15} {'Sales':<18} {'% of Total':<12} {'Transactions':<10}\n")
+        parts.append("-"*60 + "\n")
+        
+        region_stats = stats_all['by_region']
+        parts.append(''.join(
+            f"{region:<15} ₹{stats['total_sales']:>15,.2f} "
+            f"{stats['percentage']:>10.2f}% {stats['transaction_count']:>10}\n"
+            for region, stats in region_stats.items()
+        ))
+        
+        parts.append("\n")
+        
+        # ===== 4. TOP 5 PRODUCTS =====
+        parts.append("TOP 5 SELLING PRODUCTS\n")
+        parts.append("-"*60 + "\n")
+        parts.append(f"{'Rank':<6} {'Product Name':<25} {'Qty':<8} {'Revenue':<15}\n")
+        parts.append("-"*60 + "\n")
+        
+        top_products = stats_all['top_products']
+        parts.append(''.join(
+            f"{rank:<6} {product:<25} {qty:<8} ₹{revenue:>13,.2f}\n"
+            for rank, (product, qty, revenue) in enumerate(top_products, 1)
+        ))
+        
+        parts.append("\n")
+        
+        # ===== 5. TOP 5 CUSTOMERS =====
+        parts.append("TOP 5 CUSTOMERS\n")
+        parts.append("-"*60 + "\n")
+        parts.append(f"{'Rank':<6} {'Customer ID':<15} {'Total Spent':<18} {'Orders':<10}\n")
+        parts.append("-"*60 + "\n")
+        
+        customer_stats = stats_all['by_customer']
+        parts.append(''.join(
+            f"{rank:<6} {customer_id:<15} ₹{stats['total_spent']:>15,.2f} "
+            f"{stats['purchase_count']:>10}\n"
+            for rank, (customer_id, stats) in enumerate(top_customers(customer_stats, 5), 1)
+        ))
+        
+        parts.append("\n")
+        
+        # ===== 6. DAILY SALES TREND =====
+        parts.append("DAILY SALES TREND\n")
+        parts.append("-"*60 + "\n")
+        parts.append(f"{'Date':<12} {'Revenue':<18} {'Transactions':<15} {'Unique Customers':<15}\n")
+        parts.append("-"*60 + "\n")
+        
+        # One formatted block for the whole table; this is the section that
+        # grows with the data (one row per day)
+        parts.append(''.join(
+            f"{date:<12} ₹{stats['revenue']:>15,.2f} "
+            f"{stats['transaction_count']:>14} {stats['unique_customers']:>16}\n"
+            for date, stats in daily_trend.items()
+        ))
+        
+        parts.append("\n")
+        
+        # ===== 7. PRODUCT PERFORMANCE ANALYSIS =====
+        parts.append("PRODUCT PERFORMANCE ANALYSIS\n")
+        parts.append("-"*60 + "\n")
+        
+        peak_date, peak_revenue, peak_count = stats_all['peak_day']
+        parts.append(f"Peak Sales Day:        {peak_date}\n")
+        parts.append(f"Peak Revenue:          ₹{peak_revenue:,.2f}\n")
+        parts.append(f"Transactions on Peak:  {peak_count}\n\n")
+        
+        low_products = stats_all['low_products']
+        if low_products:
+            parts.append("Low Performing Products (Qty < 10):\n")
+            parts.append(f"{'Product Name':<25} {'Qty':<8} {'Revenue':<15}\n")
+            parts.append("-"*60 + "\n")
+            parts.append(''.join(
+                f"{product:<25} {qty:<8} ₹{revenue:>13,.2f}\n"
+                for product, qty, revenue in low_products
+            ))
+        else:
+            parts.append("Low Performing Products: None\n")
+        
+        # Average transaction value per region
+        parts.append("\nAverage Transaction Value per Region:\n")
+        parts.append("-"*60 + "\n")
+        parts.append(''.join(
+            f"{region:<20} ₹{stats['avg_transaction']:>15,.2f}\n"
+            for region, stats in region_stats.items()
+        ))
+        
+        parts.append("\n")
+        
+        # ===== 8. API ENRICHMENT SUMMARY =====
+        parts.append("API ENRICHMENT SUMMARY\n")
+        parts.append("-"*60 + "\n")
+        
+        matched_count = sum(1 for t in enriched_transactions if t.get('API_Match', False))
+        total_enriched = len(enriched_transactions)
+        success_rate = (matched_count / total_enriched * 100) if total_enriched > 0 else 0
+        
+        parts.append(f"Total Products Enriched:  {matched_count}/{total_enriched}\n")
+        parts.append(f"Success Rate:             {success_rate:.1f}%\n")
+        
+        # Find non-matched products; dict.fromkeys de-duplicates in
+        # first-seen order with hash lookups instead of list scans
+        non_matched = list(dict.fromkeys(
+            t['ProductID'] for t in enriched_transactions
+            if not t.get('API_Match', False)
+        ))
+        
+        if non_matched:
+            parts.append(f"\nProducts Not Enriched ({len(non_matched)}):\n")
+            parts.append(''.join(
+                f"  - {product_id}\n"
+                for product_id in non_matched[:10]  # Show first 10
+            ))
+            if len(non_matched) > 10:
+                parts.append(f"  ... and {len(non_matched) - 10} more\n")
+        
+        parts.append("\n")
+        parts.append("="*60 + "\n")
+        parts.append(" "*15 + "END OF REPORT\n")
+        parts.append("="*60 + "\n")
+        
         with open(output_file, 'w', encoding='utf-8') as f:
-            # ===== 1. HEADER =====
-            f.write("="*60 + "\n")
-            f.write(" "*15 + "SALES ANALYTICS REPORT\n")
-            f.write(" "*10 + f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(" "*10 + f"Records Processed: {len(transactions)}\n")
-            f.write("="*60 + "\n\n")
-            
-            # ===== 2. OVERALL SUMMARY =====
-            f.write("OVERALL SUMMARY\n")
-            f.write("-"*60 + "\n")
-            
-            total_revenue = calculate_total_revenue(transactions)
-            total_transactions = len(transactions)
-            avg_order_value = total_revenue / total_transactions if total_transactions > 0 else 0
-            
-            # Get date range
-            dates = [t['Date'] for t in transactions]
-            min_date = min(dates) if dates else "N/A"
-            max_date = max(dates) if dates else "N/A"
-            
-            f.write(f"Total Revenue:         ₹{total_revenue:,.2f}\n")
-            f.write(f"Total Transactions:    {total_transactions}\n")
-            f.write(f"Average Order Value:   ₹{avg_order_value:,.2f}\n")
-            f.write(f"Date Range:            {min_date} to {max_date}\n")
-            f.write("\n")
-            
-            # ===== 3. REGION-WISE PERFORMANCE =====
-            f.write("REGION-WISE PERFORMANCE\n")
-            f.write("-"*60 + "\n")
-            f.write(f"{'Region':<15} {'Sales':<18} {'% of Total':<12} {'Transactions':<10}\n")
-            f.write("-"*60 + "\n")
-            
-            region_stats = region_wise_sales(transactions)
-            for region, stats in region_stats.items():
-                f.write(f"{region:<15} ₹{stats['total_sales']:>15,.2f} "
-                       f"{stats['percentage']:>10.2f}% {stats['transaction_count']:>10}\n")
-            
-            f.write("\n")
-            
-            # ===== 4. TOP 5 PRODUCTS =====
-            f.write("TOP 5 SELLING PRODUCTS\n")
-            f.write("-"*60 + "\n")
-            f.write(f"{'Rank':<6} {'Product Name':<25} {'Qty':<8} {'Revenue':<15}\n")
-            f.write("-"*60 + "\n")
-            
-            top_products = top_selling_products(transactions, n=5)
-            for rank, (product, qty, revenue) in enumerate(top_products, 1):
-                f.write(f"{rank:<6} {product:<25} {qty:<8} ₹{revenue:>13,.2f}\n")
-            
-            f.write("\n")
-            
-            # ===== 5. TOP 5 CUSTOMERS =====
-            f.write("TOP 5 CUSTOMERS\n")
-            f.write("-"*60 + "\n")
-            f.write(f"{'Rank':<6} {'Customer ID':<15} {'Total Spent':<18} {'Orders':<10}\n")
-            f.write("-"*60 + "\n")
-            
-            customer_stats = customer_analysis(transactions)
-            top_customers = list(customer_stats.items())[:5]
-            for rank, (customer_id, stats) in enumerate(top_customers, 1):
-                f.write(f"{rank:<6} {customer_id:<15} ₹{stats['total_spent']:>15,.2f} "
-                       f"{stats['purchase_count']:>10}\n")
-            
-            f.write("\n")
-            
-            # ===== 6. DAILY SALES TREND =====
-            f.write("DAILY SALES TREND\n")
-            f.write("-"*60 + "\n")
-            f.write(f"{'Date':<12} {'Revenue':<18} {'Transactions':<15} {'Unique Customers':<15}\n")
-            f.write("-"*60 + "\n")
-            
-            daily_trend = daily_sales_trend(transactions)
-            for date, stats in daily_trend.items():
-                f.write(f"{date:<12} ₹{stats['revenue']:>15,.2f} "
-                       f"{stats['transaction_count']:>14} {stats['unique_customers']:>16}\n")
-            
-            f.write("\n")
-            
-            # ===== 7. PRODUCT PERFORMANCE ANALYSIS =====
-            f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-            f.write("-"*60 + "\n")
-            
-            peak_date, peak_revenue, peak_count = find_peak_sales_day(transactions)
-            f.write(f"Peak Sales Day:        {peak_date}\n")
-            f.write(f"Peak Revenue:          ₹{peak_revenue:,.2f}\n")
-            f.write(f"Transactions on Peak:  {peak_count}\n\n")
-            
-            low_products = low_performing_products(transactions, threshold=10)
-            if low_products:
-                f.write("Low Performing Products (Qty < 10):\n")
-                f.write(f"{'Product Name':<25} {'Qty':<8} {'Revenue':<15}\n")
-                f.write("-"*60 + "\n")
-                for product, qty, revenue in low_products:
-                    f.write(f"{product:<25} {qty:<8} ₹{revenue:>13,.2f}\n")
-            else:
-                f.write("Low Performing Products: None\n")
-            
-            # Average transaction value per region
-            f.write("\nAverage Transaction Value per Region:\n")
-            f.write("-"*60 + "\n")
-            for region, stats in region_stats.items():
-                avg_trans = stats['total_sales'] / stats['transaction_count'] if stats['transaction_count'] > 0 else 0
-                f.write(f"{region:<20} ₹{avg_trans:>15,.2f}\n")
-            
-            f.write("\n")
-            
-            # ===== 8. API ENRICHMENT SUMMARY =====
-            f.write("API ENRICHMENT SUMMARY\n")
-            f.write("-"*60 + "\n")
-            
-            matched_count = sum(1 for t in enriched_transactions if t.get('API_Match', False))
-            total_enriched = len(enriched_transactions)
-            success_rate = (matched_count / total_enriched * 100) if total_enriched > 0 else 0
-            
-            f.write(f"Total Products Enriched:  {matched_count}/{total_enriched}\n")
-            f.write(f"Success Rate:             {success_rate:.1f}%\n")
-            
-            # Find non-matched products
-            non_matched = []
-            for t in enriched_transactions:
-                if not t.get('API_Match', False) and t['ProductID'] not in non_matched:
-                    non_matched.append(t['ProductID'])
-            
-            if non_matched:
-                f.write(f"\nProducts Not Enriched ({len(non_matched)}):\n")
-                for product_id in non_matched[:10]:  # Show first 10
-                    f.write(f"  - {product_id}\n")
-                if len(non_matched) > 10:
-                    f.write(f"  ... and {len(non_matched) - 10} more\n")
-            
-            f.write("\n")
-            f.write("="*60 + "\n")
-            f.write(" "*15 + "END OF REPORT\n")
-            f.write("="*60 + "\n")
+            f.write(''.join(parts))
         
         print(f"✓ Report saved to: {output_file}")
         return True